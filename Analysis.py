@@ -0,0 +1,101 @@
+# File: Analysis.py
+# Analyzes many Mancala positions, for example every position of recorded
+# games, with Player.analyze spread over worker processes.
+# Usage: python Analysis.py ply k processes SOURCE...
+#   (SOURCE is a SelfPlay directory or .jsonl file, k = 0 for every move)
+# Run it without arguments to check Player.analyze.
+
+import sys
+from random import Random
+from multiprocessing import Pool
+from MancalaBoard import *
+from PositionBook import readGames
+
+
+def gamePositions(games):
+    """ Yield (id, board, playerNum) for every position reached in games,
+        an iterable of (id, winner, moves) as returned by readGames """
+    for gameId, winner, moves in games:
+        board = MancalaBoard()
+        for i in range(len(moves)):
+            num, cup = moves[i]
+            yield "%s:%d" % (gameId, i), deepcopy(board), num
+            board.makeMove(Player(num, Player.HUMAN), cup)
+
+def analyzeJob(job):
+    """ Analyze one position in a worker process.
+        Returns (id, list of (score, move, principal variation)) """
+    positionId, P1Cups, P2Cups, scoreCups, num, ply, k = job
+    board = MancalaBoard()
+    board.P1Cups[:] = P1Cups
+    board.P2Cups[:] = P2Cups
+    board.scoreCups[:] = scoreCups
+    return positionId, syw973(num, Player.CUSTOM, 0).analyze(board, ply, k)
+
+def analyzePositions(positions, ply, k=None, processes=None):
+    """ Analyze a stream of (id, board, playerNum) positions on processes
+        workers (one per CPU by default).  Yield (id, analysis) in the order
+        the analyses finish. """
+    jobs = ((positionId, board.P1Cups, board.P2Cups, board.scoreCups, num, ply, k)
+            for positionId, board, num in positions)
+    pool = Pool(processes)
+    try:
+        for result in pool.imap_unordered(analyzeJob, jobs, chunksize=4):
+            yield result
+    finally:
+        pool.terminate()
+
+def selfCheck(positions=20, plies=(2, 3, 4), seed=0):
+    """ Check that analyze, for every move and for the k best, returns the
+        scores each move gets from a full window search of its own, on
+        positions reached by random play.  Returns the number of analyses
+        checked. """
+    rng = Random(seed)
+    checked = 0
+    while checked < positions * len(plies) * 4:
+        board = MancalaBoard()
+        players = [Player(1, Player.RANDOM), Player(2, Player.RANDOM)]
+        turn = 0
+        for i in range(rng.randint(0, 30)):
+            if board.gameOver():
+                break
+            if not board.makeMove(players[turn], rng.choice(board.legalMoves(players[turn]))):
+                turn = 1 - turn
+        if board.gameOver():
+            continue
+        player = syw973(players[turn].num, Player.CUSTOM, 0)
+        # scores only depend on the window with a quiescence search
+        player.quiescenceNodes = Player.QUIESCENCE_NODES
+        for ply in plies:
+            scores = []
+            for move in board.legalMoves(player):
+                child = deepcopy(board)
+                again = child.makeMove(player, move)
+                ctx = player.searchContext(child, ply)
+                ctx.hashing = True
+                player.table = {}
+                score, pv = player.analyzeNode(ctx.board, again, -INFINITY,
+                                               INFINITY, ply-1)
+                scores += [(score, move)]
+            ctx.hashing = False
+            player.table = None
+            scores.sort(key=lambda score: -score[0])
+            for k in (None, 1, 2, 3):
+                analysis = player.analyze(board, ply, k)
+                assert [result[:2] for result in analysis] == scores[:k], \
+                       (ply, k, analysis, scores)
+                checked += 1
+    return checked
+
+if __name__ == "__main__":
+    if len(sys.argv) == 1:
+        print "checked", selfCheck(), "analyses"
+        sys.exit()
+    ply, k, processes = [int(arg) for arg in sys.argv[1:4]]
+    for source in sys.argv[4:]:
+        for positionId, analysis in analyzePositions(gamePositions(readGames(source)),
+                                                     ply, k or None, processes):
+            print positionId,
+            for score, move, pv in analysis:
+                print "%d:%.3f" % (move, score),
+            print
@@ -0,0 +1,254 @@
+# File: IterativeSearch.py
+# The search of Player.customMove, including its quiescence search, run from
+# an explicit stack of frames instead of recursion.  Depth is not limited by
+# Python's recursion limit, and a search can be paused after any number of
+# nodes and resumed later, so that many searches can share one thread.
+# Run this file to check that it agrees with customMove.
+
+from random import Random
+from MancalaBoard import *
+from SearchContext import *
+
+# Kinds of frame on the stack
+ROOT = 0 # customMove
+MAX = 1  # customMaxMove
+MIN = 2  # customMinMove
+QMAX = 3 # quiesceMax
+QMIN = 4 # quiesceMin
+
+
+class IterativeSearch(object):
+    """ A customMove search for one player that can run a few nodes at a
+        time """
+    __slots__ = ('player', 'ctx', 'size', 'depth', 'kind', 'alpha', 'beta',
+                 'ply', 'best', 'index', 'value', 'returning', 'move',
+                 'qNodes', 'nodes', 'done', 'result')
+
+    def __init__(self, player):
+        """ Initialize a search for player; start it with start() """
+        self.player = player
+        self.ctx = None
+        self.size = 0
+        self.depth = 0
+        self.kind = []
+        self.alpha = []
+        self.beta = []
+        self.ply = []
+        self.best = []
+        self.index = []
+        self.done = True
+        self.result = None
+
+    def reserve(self, size):
+        """ Make sure the stack holds at least size frames """
+        while self.size < size:
+            self.kind += [ROOT]
+            self.alpha += [0.0]
+            self.beta += [0.0]
+            self.ply += [0]
+            self.best += [0.0]
+            self.index += [0]
+            self.size += 1
+
+    def start(self, board, ply):
+        """ Get ready to search board ply plies deep """
+        player = self.player
+        size = ply + player.quiescenceNodes + 2
+        if self.ctx is None:
+            self.ctx = SearchContext(player, Player(player.opp, player.type, player.ply),
+                                     board, size)
+        else:
+            self.ctx.reserve(size)
+        self.reserve(size)
+        self.ctx.load(board)
+        board = self.ctx.board
+        self.nodes = 0
+        self.done = False
+        self.result = None
+        self.returning = False
+        self.move = -1
+        if board.gameOver(): # Game done
+            self.finish(player.score(board), -1)
+        elif ply == 0:
+            self.finish(player.score(board), board.legalMoves(player)[0])
+        else:
+            self.push(ROOT, -INFINITY, INFINITY, ply, -INFINITY, player, False)
+
+    def finish(self, score, move):
+        """ Record the result of the search """
+        self.result = (score, move)
+        self.done = True
+
+    def push(self, kind, alpha, beta, ply, best, mover, noisy):
+        """ Put a frame for the current board on top of the stack """
+        d = self.ctx.top
+        self.depth = d
+        self.kind[d] = kind
+        self.alpha[d] = alpha
+        self.beta[d] = beta
+        self.ply[d] = ply
+        self.best[d] = best
+        self.index[d] = 0
+        self.ctx.generate(mover, noisy)
+
+    def enter(self, kind, alpha, beta, ply):
+        """ Start a node of the given kind on the current board.  Either
+            pushes its frame, or returns False with its score in value. """
+        player = self.player
+        board = self.ctx.board
+        if kind == MAX or kind == MIN:
+            if board.gameOver():
+                self.value = player.score(board)
+                return False
+            elif ply == 0:
+                self.qNodes = player.quiescenceNodes
+                if kind == MAX:
+                    kind = QMAX
+                else:
+                    kind = QMIN
+            elif kind == MAX:
+                self.push(MAX, alpha, beta, ply, -INFINITY, player, False)
+                return True
+            else:
+                self.push(MIN, alpha, beta, ply, INFINITY, self.ctx.opponent, False)
+                return True
+        # Stand pat like quiesceMax and quiesceMin
+        score = player.score(board)
+        if kind == QMAX:
+            if board.gameOver() or score >= beta:
+                self.value = score
+                return False
+            self.push(QMAX, max(alpha, score), beta, 0, score, player, True)
+        else:
+            if board.gameOver() or score <= alpha:
+                self.value = score
+                return False
+            self.push(QMIN, alpha, min(beta, score), 0, score, self.ctx.opponent, True)
+        return True
+
+    def run(self, every=1000):
+        """ Search until done (after start), yielding (nodes, done, score,
+            move) after every every nodes and once more at the end.  score
+            and move are the best root move found so far.  Stop iterating to
+            pause the search; iterate again to resume it. """
+        ctx = self.ctx
+        player = self.player
+        opponent = ctx.opponent
+        steps = 0
+        while not self.done:
+            d = self.depth
+            kind = self.kind[d]
+            if self.returning:
+                # A child node has its score: undo its move and use the score
+                ctx.undo()
+                self.returning = False
+                v = self.value
+                if kind == ROOT:
+                    if v > self.best[d]:
+                        self.move = ctx.moves[d][self.index[d]]
+                        self.best[d] = v
+                    self.alpha[d] = max(self.alpha[d], self.best[d])
+                elif kind == MAX or kind == QMAX:
+                    self.best[d] = max(self.best[d], v)
+                    if self.best[d] >= self.beta[d]:
+                        self.pop(d)
+                        continue
+                    self.alpha[d] = max(self.alpha[d], self.best[d])
+                else:
+                    self.best[d] = min(self.best[d], v)
+                    if self.best[d] <= self.alpha[d]:
+                        self.pop(d)
+                        continue
+                    self.beta[d] = min(self.beta[d], self.best[d])
+                self.index[d] += 1
+            i = self.index[d]
+            if i >= ctx.nmoves[d] or (kind >= QMAX and self.qNodes <= 0):
+                self.pop(d)
+                continue
+            if kind >= QMAX:
+                self.qNodes -= 1
+            if kind == MIN or kind == QMIN:
+                mover = opponent
+            else:
+                mover = player
+            again = ctx.make(mover, ctx.moves[d][i])
+            # An extra turn keeps the same kind of node, otherwise it swaps
+            if kind == ROOT:
+                child = MAX if again else MIN
+            elif kind == MAX or kind == MIN:
+                child = kind if again else 3 - kind
+            else:
+                child = kind if again else 7 - kind
+            if not self.enter(child, self.alpha[d], self.beta[d], self.ply[d] - 1):
+                self.returning = True
+            self.nodes += 1
+            steps += 1
+            if steps == every:
+                steps = 0
+                yield self.nodes, False, self.best[0], self.move
+        yield self.nodes, True, self.result[0], self.result[1]
+
+    def pop(self, d):
+        """ Leave frame d with its best score """
+        if d == 0:
+            self.finish(self.best[0], self.move)
+        else:
+            self.value = self.best[d]
+            self.depth = d - 1
+            self.returning = True
+
+
+def interleave(searches, every=1000):
+    """ Run started searches on one thread, every nodes of each in turn.
+        Yields (search, snapshot) for every slice until all are done. """
+    running = [(search, search.run(every)) for search in searches]
+    while running:
+        for item in list(running):
+            search, steps = item
+            snapshot = next(steps, None)
+            if snapshot is None:
+                running.remove(item)
+            else:
+                yield search, snapshot
+
+
+def selfCheck(positions=25, plies=(1, 2, 4, 6), seed=0):
+    """ Check that IterativeSearch returns what customMove does, with and
+        without quiescence, on positions reached by random play, both run
+        to the end and interleaved a few nodes at a time.
+        Returns the number of searches checked. """
+    rng = Random(seed)
+    boards = []
+    while len(boards) < positions:
+        board = MancalaBoard()
+        players = [Player(1, Player.RANDOM), Player(2, Player.RANDOM)]
+        turn = 0
+        for i in range(rng.randint(0, 35)):
+            if board.gameOver():
+                break
+            if not board.makeMove(players[turn], rng.choice(board.legalMoves(players[turn]))):
+                turn = 1 - turn
+        if not board.gameOver():
+            boards += [(board, players[turn].num)]
+    checked = 0
+    for ply in plies:
+        for quiescence in (0, Player.QUIESCENCE_NODES):
+            searches = []
+            expected = []
+            for board, num in boards:
+                player = syw973(num, Player.CUSTOM, 0)
+                player.startMove = False
+                player.quiescenceNodes = quiescence
+                expected += [player.customMove(board, ply)]
+                assert player.iterativeMove(board, ply) == expected[-1]
+                search = IterativeSearch(player)
+                search.start(board, ply)
+                searches += [search]
+            for search, snapshot in interleave(searches, 50):
+                pass
+            assert [search.result for search in searches] == expected
+            checked += 2 * len(searches)
+    return checked
+
+if __name__ == "__main__":
+    print "checked", selfCheck(), "searches"
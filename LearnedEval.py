@@ -0,0 +1,167 @@
+# File: LearnedEval.py
+# A learned evaluation function for Mancala: a linear model or small MLP over
+# the 14 pits and stores plus the side to move, trained with NumPy on
+# positions from headless self-play.
+# Usage: python LearnedEval.py [games] [hidden] [weightfile]
+
+import os
+import sys
+from random import Random
+import numpy as np
+from MancalaBoard import *
+
+# 6 cups and a mancala for each player, then the side to move
+NFEATURES = 15
+
+# Where the LEARNED player looks for its weights by default
+WEIGHT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "mancala_weights.npz")
+
+
+def boardFeatures(board, toMove, row):
+    """ Write the features of board with player toMove to move into row """
+    ncups = board.NCUPS
+    row[0:ncups] = board.P1Cups
+    row[ncups] = board.scoreCups[0]
+    row[ncups+1:2*ncups+1] = board.P2Cups
+    row[2*ncups+1] = board.scoreCups[1]
+    # 48 stones in the game, so every pit is in [0, 1]
+    row[0:2*ncups+2] /= 48.0
+    row[2*ncups+2] = 1.0 if toMove == 1 else -1.0
+
+def outcome(board):
+    """ Returns 1, 0 or -1 as player 1 wins, ties or loses a finished game """
+    if board.hasWon(1):
+        return 1.0
+    elif board.hasWon(2):
+        return -1.0
+    return 0.0
+
+
+class LearnedEval(object):
+    """ Evaluates Mancala positions with a trained model, a batch of
+        positions at a time """
+
+    def __init__(self, layers, rows=6):
+        """ layers is a list of (weights, bias) pairs; every layer but the
+            last is followed by tanh.  rows is how many positions one
+            batch can hold. """
+        self.layers = layers
+        self.X = np.zeros((rows, NFEATURES))
+        self.exact = np.zeros(rows)
+        self.terminal = np.zeros(rows, dtype=bool)
+
+    def evaluate(self, X):
+        """ Returns the model's value for player 1 of each row of X """
+        for W, b in self.layers[:-1]:
+            X = np.tanh(X.dot(W) + b)
+        W, b = self.layers[-1]
+        return np.clip(X.dot(W) + b, -1.0, 1.0)[:, 0]
+
+    def setRow(self, i, board, toMove):
+        """ Put board, with player toMove to move, in row i of the batch """
+        boardFeatures(board, toMove, self.X[i])
+        self.terminal[i] = board.gameOver()
+        if self.terminal[i]:
+            self.exact[i] = outcome(board)
+
+    def evaluateRows(self, n, playerNum):
+        """ Evaluate the first n rows of the batch in one matrix multiply.
+            Finished games get their exact outcome.
+            Returns the values for player playerNum. """
+        values = np.where(self.terminal[:n], self.exact[:n],
+                          self.evaluate(self.X[:n]))
+        if playerNum == 1:
+            return values
+        return -values
+
+    def score(self, board, toMove, playerNum):
+        """ Returns the value of a single board for player playerNum """
+        self.setRow(0, board, toMove)
+        return self.evaluateRows(1, playerNum)[0]
+
+
+def loadEvaluator(path=WEIGHT_FILE):
+    """ Returns a LearnedEval with the weights saved in path """
+    if not os.path.exists(path):
+        raise IOError("no weights in %s, run LearnedEval.py first to train "
+                      "them" % path)
+    weights = np.load(path)
+    layers = []
+    for i in range(len(weights.files) // 2):
+        layers += [(weights["W%d" % i].astype(np.float64),
+                    weights["b%d" % i].astype(np.float64))]
+    return LearnedEval(layers)
+
+def saveWeights(path, layers):
+    """ Save layers as float32 arrays W0, b0, W1, b1, ... in path """
+    arrays = {}
+    for i in range(len(layers)):
+        arrays["W%d" % i] = layers[i][0].astype(np.float32)
+        arrays["b%d" % i] = layers[i][1].astype(np.float32)
+    np.savez(path, **arrays)
+
+
+def selfPlay(games, ply=2, epsilon=0.1, seed=0):
+    """ Play games between two syw973 custom players searching ply plies,
+        each making a random move with probability epsilon.
+        Returns (X, y): the features of every position reached and the
+        outcome of its game for player 1. """
+    rng = Random(seed)
+    rows = []
+    results = []
+    for g in range(games):
+        board = MancalaBoard()
+        players = [syw973(1, Player.CUSTOM, 0), syw973(2, Player.CUSTOM, 0)]
+        turn = 0
+        start = len(rows)
+        while not board.gameOver():
+            player = players[turn]
+            player.startMove = False
+            row = np.zeros(NFEATURES)
+            boardFeatures(board, player.num, row)
+            rows += [row]
+            if rng.random() < epsilon:
+                move = rng.choice(board.legalMoves(player))
+            else:
+                val, move = player.customMove(board, ply)
+            if not board.makeMove(player, move):
+                turn = 1 - turn
+        results += [outcome(board)] * (len(rows) - start)
+    return np.array(rows), np.array(results)
+
+def train(X, y, hidden=0, epochs=2000, rate=0.5, seed=0):
+    """ Fit a model of the outcomes y from the features X.
+        With hidden = 0 this is a least squares linear model, otherwise a
+        one hidden layer tanh MLP trained by full batch gradient descent.
+        Returns the list of (weights, bias) layers. """
+    if hidden == 0:
+        A = np.hstack([X, np.ones((X.shape[0], 1))])
+        w = np.linalg.lstsq(A, y, rcond=None)[0]
+        return [(w[:-1].reshape(-1, 1), w[-1:])]
+    rng = np.random.RandomState(seed)
+    W0 = rng.randn(X.shape[1], hidden) / np.sqrt(X.shape[1])
+    b0 = np.zeros(hidden)
+    W1 = rng.randn(hidden, 1) / np.sqrt(hidden)
+    b1 = np.zeros(1)
+    target = y.reshape(-1, 1)
+    for epoch in range(epochs):
+        H = np.tanh(X.dot(W0) + b0)
+        err = (H.dot(W1) + b1 - target) / X.shape[0]
+        dH = err.dot(W1.T) * (1 - H * H)
+        W1 -= rate * H.T.dot(err)
+        b1 -= rate * err.sum(axis=0)
+        W0 -= rate * X.T.dot(dH)
+        b0 -= rate * dH.sum(axis=0)
+    return [(W0, b0), (W1, b1)]
+
+if __name__ == "__main__":
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    hidden = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    path = sys.argv[3] if len(sys.argv) > 3 else WEIGHT_FILE
+    X, y = selfPlay(games)
+    layers = train(X, y, hidden)
+    saveWeights(path, layers)
+    error = LearnedEval(layers).evaluate(X) - y
+    print "trained on", len(y), "positions, mean squared error", (error * error).mean()
+    print "saved weights to", path
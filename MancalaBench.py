@@ -0,0 +1,106 @@
+# File: MancalaBench.py
+# Times the computer players' searches on a fixed set of Mancala positions
+# and reports nodes per second, peak memory, and per node the boards
+# copied and the young garbage collections.
+# Usage: python MancalaBench.py [ply] [positions]
+
+import gc
+import resource
+import sys
+import time
+from random import Random
+from MancalaBoard import *
+
+
+def benchPositions(count, seed=0):
+    """ Returns a list of (board, playerNum) positions reached by random
+        play, the same list every time for the same count and seed """
+    rng = Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = MancalaBoard()
+        players = [Player(1, Player.RANDOM), Player(2, Player.RANDOM)]
+        turn = 0
+        for i in range(rng.randint(0, 30)):
+            if board.gameOver():
+                break
+            if not board.makeMove(players[turn], rng.choice(board.legalMoves(players[turn]))):
+                turn = 1 - turn
+        if not board.gameOver():
+            positions += [(board, players[turn].num)]
+    return positions
+
+def benchSearch(player, board, ply):
+    """ Run one search of player on board.
+        Returns (seconds, nodes, copies, collections, peak KB).
+        copies counts the boards the search copied with deepcopy.
+        collections counts how often the garbage collector's youngest
+        generation was collected with a threshold of a single object.  That
+        follows the container objects the search keeps alive, not the ones
+        it frees again, so it is only a lower bound on its allocations.
+        peak KB is how much the search raised the process's peak memory."""
+    if player.type == Player.MINIMAX:
+        search = player.minimaxMove
+    elif player.type == Player.ABPRUNE:
+        search = player.alphaBetaMove
+    else:
+        search = player.customMove
+    # count the copies through the deepcopy that Player's searches call
+    module = sys.modules[player.__module__]
+    copies = [0]
+    def countingCopy(x, memo=None):
+        copies[0] += 1
+        return deepcopy(x, memo)
+    module.deepcopy = countingCopy
+    gc.collect()
+    threshold = gc.get_threshold()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    gc.set_threshold(1, 1000000000, 1000000000)
+    collections = gc.get_count()[1]
+    start = time.time()
+    try:
+        search(board, ply)
+    finally:
+        seconds = time.time() - start
+        collections = gc.get_count()[1] - collections
+        gc.set_threshold(*threshold)
+        module.deepcopy = deepcopy
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - peak
+    return seconds, player.context.nodes, copies[0], collections, peak
+
+def bench(ply=6, count=20):
+    """ Print the search statistics of each computer player type over
+        count positions """
+    positions = benchPositions(count)
+    print "player\tply\tnodes\tnodes/s\tcopies/node\tgc/node\tpeak KB"
+    for playerType, name in [(Player.MINIMAX, "minimax"),
+                             (Player.ABPRUNE, "abprune"),
+                             (Player.CUSTOM, "custom")]:
+        seconds = 0.0
+        nodes = 0
+        copies = 0
+        collections = 0
+        peak = 0
+        players = {}
+        for board, num in positions:
+            if num not in players:
+                # one player per side, so its search context is reused,
+                # warmed up so that building the context is not measured
+                players[num] = syw973(num, playerType, 0)
+                players[num].startMove = False
+                benchSearch(players[num], board, ply)
+            s, n, c, g, p = benchSearch(players[num], board, ply)
+            seconds += s
+            nodes += n
+            copies += c
+            collections += g
+            peak = max(peak, p)
+        print "%s\t%d\t%d\t%d\t%.4f\t\t%.4f\t%d" % (name, ply, nodes,
+                                                    nodes / max(seconds, 1e-9),
+                                                    float(copies) / max(nodes, 1),
+                                                    float(collections) / max(nodes, 1),
+                                                    peak)
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    bench(*args)
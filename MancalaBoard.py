@@ -58,6 +58,37 @@ class MancalaBoard:
         return moves
 
 
+    def isNoisyMove( self, player, cup ):
+        """ Returns whether a legal move ends in the player's mancala (an
+            extra turn) or makes a capture """
+        nstones = self.getPlayersCups(player.num)[cup-1]
+        # One lap is our cups, our mancala and the opponent's cups
+        if (cup - 1 + nstones) % (2*self.NCUPS + 1) == self.NCUPS:
+            return True
+        return self.isCapture(player, cup)
+
+    def isCapture( self, player, cup ):
+        """ Returns whether a legal move ends in an empty cup on the
+            player's side (a capture).
+            Follows the sowing rules of makeMoveHelp without making the move"""
+        cups = self.getPlayersCups(player.num)
+        nstones = cups[cup-1]
+        last = (cup - 1 + nstones) % (2*self.NCUPS + 1)
+        if last < self.NCUPS:
+            # A full lap refills the emptied starting cup with a single stone
+            return nstones == 2*self.NCUPS + 1 or \
+                   (nstones < 2*self.NCUPS + 1 and cups[last] == 0)
+        return False
+
+    def noisyMoves( self, player ):
+        """ Returns a list of the legal moves for the given player that
+            earn an extra turn or make a capture """
+        moves = []
+        for m in self.legalMoves(player):
+            if self.isNoisyMove(player, m):
+                moves += [m]
+        return moves
+
     def makeMove( self, player, cup ):
         again = self.makeMoveHelp(player, cup)
         if self.gameOver():
@@ -12,6 +12,7 @@ from random import *
 from decimal import *
 from copy import *
 from MancalaBoard import *
+from SearchContext import *
 from math import log, sqrt
 import time
 
@@ -25,6 +26,19 @@ class Player:
     MINIMAX = 2
     ABPRUNE = 3
     CUSTOM = 4
+    LEARNED = 5
+
+    # Nodes a single quiescence search may expand past the ply limit, for
+    # players that turn it on by setting quiescenceNodes.  It is off by
+    # default: at the same time per move a shallower search with it loses
+    # to customMove's ply 10 search without it.
+    QUIESCENCE_NODES = 64
+
+    # Times a position must have been reached before its book move is used
+    BOOK_VISITS = 20
+
+    # Most plies chooseMove lets a LEARNED player search
+    LEARNED_PLY = 6
 
     def __init__(self, playerNum, playerType, ply=0):
         """Initialize a Player with a playerNum (1 or 2), playerType (one of
@@ -33,16 +47,41 @@ class Player:
         self.opp = 2 - playerNum + 1
         self.type = playerType
         self.ply = ply
+        self.quiescenceNodes = 0 # no quiescence search
+        self.context = None # built by the first search
+        self.evaluator = None # loaded by the first learned search
+        self.weightFile = None # None for LearnedEval.WEIGHT_FILE
+        self.book = None # a PositionBook to play recorded moves from
+        self.table = None # transposition table of the running analysis
+        self.searcher = None # IterativeSearch built by the first iterativeMove
 
     def __repr__(self):
         """Returns a string representation of the Player."""
         return str(self.num)
 
+    def searchContext(self, board, ply):
+        """ Returns this player's search context, loaded with board and
+            deep enough for ply plies plus a quiescence search.
+            The context is built once and reused for every search.
+            Searches make their moves on its board, so the helpers they
+            call must be given that board and no other. """
+        size = ply + self.quiescenceNodes + 2
+        if self.context is None:
+            self.context = SearchContext(self, Player(self.opp, self.type, self.ply),
+                                         board, size)
+        else:
+            self.context.reserve(size)
+        self.context.load(board)
+        self.opponent = self.context.opponent
+        return self.context
+
     def minimaxMove(self, board, ply):
         """ Choose the best minimax move.  Returns (score, move) """
         move = -1
         score = -INFINITY
         turn = self
+        ctx = self.searchContext(board, ply)
+        board = ctx.board
         for m in board.legalMoves(self):
             #for each legal move
             if ply == 0:
@@ -50,13 +89,11 @@ class Player:
                 return (self.score(board), m)
             if board.gameOver():
                 return (-1, -1)  # Can't make a move, the game is over
-            nb = deepcopy(board)
-            #make a new board
-            nb.makeMove(self, m)
             #try the move
-            opp = Player(self.opp, self.type, self.ply)
-            s = opp.minValue(nb, ply-1, turn)
+            ctx.make(self, m)
+            s = ctx.opponent.minValue(board, ply-1, turn)
             #and see what the opponent would do next
+            ctx.undo()
             if s > score:
                 #if the result is better than our best score so far, save that move,score
                 move = m
@@ -66,47 +103,50 @@ class Player:
 
     def maxValue(self, board, ply, turn):
         """ Find the minimax value for the next move for this player
-        at a given board configuation. Returns score."""
+        at a given board configuation. Returns score.
+            board must be turn.context.board, where the moves are made """
         if board.gameOver():
             return turn.score(board)
+        if ply == 0:
+            return turn.score(board)
+        ctx = turn.context
+        d = ctx.top
+        n = ctx.generate(self)
         score = -INFINITY
-        for m in board.legalMoves(self):
-            if ply == 0:
-                #print "turn.score(board) in max value is: " + str(turn.score(board))
-                return turn.score(board)
-            # make a new player to play the other side
-            opponent = Player(self.opp, self.type, self.ply)
-            # Copy the board so that we don't ruin it
-            nextBoard = deepcopy(board)
-            nextBoard.makeMove(self, m)
-            s = opponent.minValue(nextBoard, ply-1, turn)
-            #print "s in maxValue is: " + str(s)
+        i = 0
+        while i < n:
+            # the opponent plays the other side on the same board
+            ctx.make(self, ctx.moves[d][i])
+            s = ctx.opponent.minValue(board, ply-1, turn)
+            ctx.undo()
             if s > score:
                 score = s
+            i += 1
         return score
 
     def minValue(self, board, ply, turn):
         """ Find the minimax value for the next move for this player
-            at a given board configuation. Returns score."""
+            at a given board configuation. Returns score.
+            board must be turn.context.board, where the moves are made """
         if board.gameOver():
             return turn.score(board)
+        if ply == 0:
+            return turn.score(board)
+        ctx = turn.context
+        d = ctx.top
+        n = ctx.generate(self)
         score = INFINITY
-        for m in board.legalMoves(self):
-            if ply == 0:
-                #print "turn.score(board) in min Value is: " + str(turn.score(board))
-                return turn.score(board)
-            # make a new player to play the other side
-            opponent = Player(self.opp, self.type, self.ply)
-            # Copy the board so that we don't ruin it
-            nextBoard = deepcopy(board)
-            nextBoard.makeMove(self, m)
-            s = opponent.maxValue(nextBoard, ply-1, turn)
-            #print "s in minValue is: " + str(s)
+        i = 0
+        while i < n:
+            # turn plays the other side on the same board
+            ctx.make(self, ctx.moves[d][i])
+            s = turn.maxValue(board, ply-1, turn)
+            ctx.undo()
             if s < score:
                 score = s
+            i += 1
         return score
 
-
     # The default player defines a very simple score function
     # You will write the score function in the MancalaPlayer below
     # to improve on this function.
@@ -132,8 +172,9 @@ class Player:
     # and/or a different move search order.
     def alphaBetaMove(self, board, ply):
         """ Choose a move with alpha beta pruning.  Returns (score, move) """
-        # enemy player
-        self.opponent = Player(self.opp, self.type, self.ply)
+        # enemy player and the board we search on
+        ctx = self.searchContext(board, ply)
+        board = ctx.board
 
         # Check terminal conditions
         if board.gameOver(): # Game done
@@ -142,15 +183,14 @@ class Player:
             return self.score(board), board.legalMoves(self)[0] # give up, whatever is the first one
 
         alpha = -INFINITY
-        beta = -INFINITY
+        beta = INFINITY
         score = -INFINITY
         move = -1
 
         for action in board.legalMoves(self):
-            # make a new board
-            nb = deepcopy(board)
-            nb.makeMove(self, action) # make the move with given action
-            action_score = self.alphaBetaMinMove(nb, alpha, beta, ply-1)
+            ctx.make(self, action) # make the move with given action
+            action_score = self.alphaBetaMinMove(board, alpha, beta, ply-1)
+            ctx.undo()
             if action_score > score:
                 move = action
                 score = action_score
@@ -159,35 +199,108 @@ class Player:
         return (score, move)
 
     def alphaBetaMaxMove(self, board, alpha, beta, ply):
-        """ Find the max value for this player """
+        """ Find the max value for this player
+            board must be self.context.board, where the moves are made """
         # Check terminal condition
-        if board.gameOver() or ply is 0:
+        if board.gameOver():
             return self.score(board)
+        elif ply is 0:
+            self.qNodes = self.quiescenceNodes
+            return self.quiesceMax(board, alpha, beta, False)
+        ctx = self.context
+        d = ctx.top
+        n = ctx.generate(self)
         max_score = -INFINITY
-        for action in board.legalMoves(self): # examine all feasible actions
-            # make a new board
-            nb = deepcopy(board)
-            nb.makeMove(self, action)
+        i = 0
+        while i < n: # examine all feasible actions
+            ctx.make(self, ctx.moves[d][i])
             # find opponent's move
-            max_score = max(max_score, self.alphaBetaMinMove(nb, alpha, beta, ply-1))
+            max_score = max(max_score, self.alphaBetaMinMove(board, alpha, beta, ply-1))
+            ctx.undo()
             if (max_score >= beta): # if our score is geq beta, return this score
                 return max_score
             alpha = max(alpha, max_score) # update alpha
+            i += 1
         return max_score
 
     def alphaBetaMinMove(self, board, alpha, beta, ply):
-        """ Find the minimax value for the opponent """
-        if board.gameOver() or ply is 0:
+        """ Find the minimax value for the opponent
+            board must be self.context.board, where the moves are made """
+        if board.gameOver():
             return self.score(board)
+        elif ply is 0:
+            self.qNodes = self.quiescenceNodes
+            return self.quiesceMin(board, alpha, beta, False)
+        ctx = self.context
+        d = ctx.top
+        n = ctx.generate(self.opponent)
         score = INFINITY
-        for action in board.legalMoves(self.opponent): # Examine all feasible actions by the opponent
-            # make a new board
-            nb = deepcopy(board)
-            nb.makeMove(self.opponent, action)
-            score = min(score, self.alphaBetaMaxMove(nb, alpha, beta, ply-1))
+        i = 0
+        while i < n: # Examine all feasible actions by the opponent
+            ctx.make(self.opponent, ctx.moves[d][i])
+            score = min(score, self.alphaBetaMaxMove(board, alpha, beta, ply-1))
+            ctx.undo()
             if (score <= alpha):
                 return score
             beta = min(beta, score)
+            i += 1
+        return score
+
+    def quiesceMax(self, board, alpha, beta, replay):
+        """ Keep searching this player's captures and extra turns once the
+            ply runs out, so that the score is not taken in the middle of a
+            capture chain. replay says whether an extra turn is played by
+            the same side (custom search) or not (alpha beta), in which case
+            only captures are searched. Returns score.
+            board must be self.context.board, where the moves are made """
+        # Stand pat: we don't have to make a noisy move
+        score = self.score(board)
+        if board.gameOver() or score >= beta:
+            return score
+        alpha = max(alpha, score)
+        ctx = self.context
+        d = ctx.top
+        n = ctx.generate(self, True, replay)
+        i = 0
+        while i < n:
+            if self.qNodes <= 0: # out of budget, keep what we have
+                break
+            self.qNodes -= 1
+            if ctx.make(self, ctx.moves[d][i]) and replay:
+                score = max(score, self.quiesceMax(board, alpha, beta, replay))
+            else:
+                score = max(score, self.quiesceMin(board, alpha, beta, replay))
+            ctx.undo()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+            i += 1
+        return score
+
+    def quiesceMin(self, board, alpha, beta, replay):
+        """ Same as quiesceMax, for the opponent's captures and extra turns
+            board must be self.context.board, where the moves are made """
+        score = self.score(board)
+        if board.gameOver() or score <= alpha:
+            return score
+        beta = min(beta, score)
+        ctx = self.context
+        d = ctx.top
+        n = ctx.generate(self.opponent, True, replay)
+        i = 0
+        while i < n:
+            if self.qNodes <= 0:
+                break
+            self.qNodes -= 1
+            if ctx.make(self.opponent, ctx.moves[d][i]) and replay:
+                score = min(score, self.quiesceMin(board, alpha, beta, replay))
+            else:
+                score = min(score, self.quiesceMax(board, alpha, beta, replay))
+            ctx.undo()
+            if score <= alpha:
+                return score
+            beta = min(beta, score)
+            i += 1
         return score
 
     def customMove(self, board, ply=50):
@@ -195,25 +308,25 @@ class Player:
             self.startMove = False
             return INFINITY, 3
         """ Choose a move with alpha beta pruning.  Returns (score, move) """
-        # enemy player
-        self.opponent = Player(self.opp, self.type, self.ply)
+        # enemy player and the board we search on
+        ctx = self.searchContext(board, ply)
+        board = ctx.board
         # Check terminal conditions
         if board.gameOver(): # Game done
             return self.score(board), -1
         elif ply == 0:
             return self.score(board), board.legalMoves(self)[0] # give up, whatever is the first one
         alpha = -INFINITY
-        beta = -INFINITY
+        beta = INFINITY
         score = -INFINITY
         move = -1
 
         for action in board.legalMoves(self):
-            # make a new board
-            nb = deepcopy(board)
-            if nb.makeMove(self, action): # Another move can be made 
-                action_score = self.customMaxMove(nb, alpha, beta, ply-1)
+            if ctx.make(self, action): # Another move can be made 
+                action_score = self.customMaxMove(board, alpha, beta, ply-1)
             else:
-                action_score = self.customMinMove(nb, alpha, beta, ply-1)
+                action_score = self.customMinMove(board, alpha, beta, ply-1)
+            ctx.undo()
             if action_score > score:
                 move = action
                 score = action_score
@@ -222,43 +335,282 @@ class Player:
 
     def customMaxMove(self, board, alpha, beta, ply):
         """ my custom movement is modified AB Pruning.
-            It takes into account the replay move when there is another move that can be made"""
+            It takes into account the replay move when there is another move that can be made
+            board must be self.context.board, where the moves are made """
         # Check terminal condition
-        if board.gameOver() or ply is 0:
+        if board.gameOver():
             return self.score(board)
+        elif ply is 0:
+            self.qNodes = self.quiescenceNodes
+            return self.quiesceMax(board, alpha, beta, True)
+        ctx = self.context
+        d = ctx.top
+        n = ctx.generate(self)
         max_score = -INFINITY
-        for action in board.legalMoves(self): # examine all feasible actions
-            # make a new board
-            nb = deepcopy(board)
-            if nb.makeMove(self, action): # Another move
-                max_score = max(max_score, self.customMaxMove(nb, alpha, beta, ply-1))
+        i = 0
+        while i < n: # examine all feasible actions
+            if ctx.make(self, ctx.moves[d][i]): # Another move
+                max_score = max(max_score, self.customMaxMove(board, alpha, beta, ply-1))
             else: # opponent's move
-                max_score = max(max_score, self.customMinMove(nb, alpha, beta, ply-1))
+                max_score = max(max_score, self.customMinMove(board, alpha, beta, ply-1))
+            ctx.undo()
             if (max_score >= beta): # if our score is geq beta, return this score
                 return max_score
             alpha = max(alpha, max_score) # update alpha
+            i += 1
         return max_score
 
     def customMinMove(self, board, alpha, beta, ply):
-        """ Find the minimax value for the opponent """
+        """ Find the minimax value for the opponent
+            board must be self.context.board, where the moves are made """
         """ Same thing as ABPruning Max but adds one more line to take replay into account"""
-        if board.gameOver() or ply is 0:
+        if board.gameOver():
             return self.score(board)
+        elif ply is 0:
+            self.qNodes = self.quiescenceNodes
+            return self.quiesceMin(board, alpha, beta, True)
+        ctx = self.context
+        d = ctx.top
+        n = ctx.generate(self.opponent)
+        score = INFINITY
+        i = 0
+        while i < n: # Examine all feasible actions by the opponent
+            if ctx.make(self.opponent, ctx.moves[d][i]): # Opponent makes another move
+                score = min(score, self.customMinMove(board, alpha, beta, ply-1))
+            else:
+                score = min(score, self.customMaxMove(board, alpha, beta, ply-1))
+            ctx.undo()
+            if (score <= alpha):
+                return score
+            beta = min(beta, score)
+            i += 1
+        return score
+
+    def analyze(self, board, ply, k=None):
+        """ Search every legal move of this player at once, sharing one
+            transposition table, with the replay rules of customMove.
+            Returns a list of (score, move, principal variation) for the k
+            best moves (all of them if k is None), best first.  Each
+            variation is the list of [playerNum, cup] moves expected. """
+        ctx = self.searchContext(board, ply)
+        board = ctx.board
+        ctx.hashing = True
+        self.table = {}
+        results = []
+        for action in board.legalMoves(self):
+            # Only moves better than the k-th best so far need exact scores
+            if k is not None and len(results) >= k:
+                alpha = results[k-1][0]
+            else:
+                alpha = -INFINITY
+            maximize = ctx.make(self, action)
+            s, pv = self.analyzeNode(board, maximize, alpha, INFINITY, ply-1)
+            if s > alpha and alpha != -INFINITY:
+                # The quiescence budget makes scores depend on the window,
+                # so a move that beats the bound gets its exact score
+                s, pv = self.analyzeNode(board, maximize, -INFINITY, INFINITY, ply-1)
+            ctx.undo()
+            if s > alpha or alpha == -INFINITY:
+                results += [(s, action, [[self.num, action]] + pv)]
+                results.sort(key=lambda result: -result[0])
+                if k is not None:
+                    results = results[:k]
+        ctx.hashing = False
+        self.table = None
+        return results
+
+    def analyzeNode(self, board, maximize, alpha, beta, ply):
+        """ Find the value of board with this player (maximize) or the
+            opponent to move, like customMaxMove and customMinMove, and the
+            moves that lead to it.  Returns (score, principal variation)
+            board must be self.context.board, where the moves are made """
+        if board.gameOver():
+            return self.score(board), []
+        elif ply <= 0:
+            # Quiesce with a full window: a leaf must have the same score
+            # whatever window it is reached with, or neither the table nor
+            # the top k cut off would be exact
+            self.qNodes = self.quiescenceNodes
+            if maximize:
+                return self.quiesceMax(board, -INFINITY, INFINITY, True), []
+            return self.quiesceMin(board, -INFINITY, INFINITY, True), []
+        key = (self.context.hash, maximize, ply)
+        entry = self.table.get(key)
+        if entry is not None:
+            # entry is (score, lower bound?, upper bound?, pv)
+            score, lower, upper, pv = entry
+            if (lower and upper) or (lower and score >= beta) or \
+               (upper and score <= alpha):
+                return score, pv
+        ctx = self.context
+        d = ctx.top
+        if maximize:
+            mover = self
+        else:
+            mover = self.opponent
+        n = ctx.generate(mover)
+        alpha0 = alpha
+        beta0 = beta
+        best = -INFINITY if maximize else INFINITY
+        bestPv = []
+        i = 0
+        while i < n:
+            cup = ctx.moves[d][i]
+            if ctx.make(mover, cup): # Another move for the same side
+                s, pv = self.analyzeNode(board, maximize, alpha, beta, ply-1)
+            else:
+                s, pv = self.analyzeNode(board, not maximize, alpha, beta, ply-1)
+            ctx.undo()
+            if (maximize and s > best) or (not maximize and s < best):
+                best = s
+                bestPv = [[mover.num, cup]] + pv
+            if maximize:
+                alpha = max(alpha, best)
+            else:
+                beta = min(beta, best)
+            if alpha >= beta:
+                break
+            i += 1
+        # A fail high only bounds the score from below, a fail low from above
+        self.table[key] = (best, best > alpha0, best < beta0, bestPv)
+        return best, bestPv
+
+    def iterativeMove(self, board, ply):
+        """ Same as customMove, but searched without recursion by an
+            IterativeSearch, so ply can be as deep as you like.
+            Returns (score, move) """
+        if self.startMove:
+            self.startMove = False
+            return INFINITY, 3
+        from IterativeSearch import IterativeSearch
+        if self.searcher is None:
+            self.searcher = IterativeSearch(self)
+        self.searcher.start(board, ply)
+        for snapshot in self.searcher.run():
+            pass
+        return self.searcher.result
+
+    def learnedMove(self, board, ply):
+        """ Choose a move with alpha beta pruning, taking replay moves into
+            account like customMove, and the learned evaluation from
+            LearnedEval instead of score.  Returns (score, move) """
+        if self.evaluator is None:
+            # numpy is only needed once a learned player searches
+            from LearnedEval import loadEvaluator, WEIGHT_FILE
+            self.evaluator = loadEvaluator(self.weightFile or WEIGHT_FILE)
+        ctx = self.searchContext(board, ply)
+        board = ctx.board
+        # Check terminal conditions
+        if board.gameOver(): # Game done
+            return self.evaluator.score(board, self.num, self.num), -1
+        elif ply == 0:
+            return self.evaluator.score(board, self.num, self.num), board.legalMoves(self)[0]
+        elif ply == 1: # all the children are leaves
+            values = self.learnedLeaves(self)
+            best = values.argmax()
+            return values[best], ctx.moves[ctx.top][best]
+        alpha = -INFINITY
+        beta = INFINITY
+        score = -INFINITY
+        move = -1
+
+        for action in board.legalMoves(self):
+            if ctx.make(self, action): # Another move can be made
+                action_score = self.learnedMaxMove(board, alpha, beta, ply-1)
+            else:
+                action_score = self.learnedMinMove(board, alpha, beta, ply-1)
+            ctx.undo()
+            if action_score > score:
+                move = action
+                score = action_score
+            alpha = max(alpha, score)
+        return (score, move)
+
+    def learnedLeaves(self, player):
+        """ Evaluate every move of player from the current board as one
+            batch.  Returns the values for this player, one per move. """
+        ctx = self.context
+        d = ctx.top
+        n = ctx.generate(player)
+        i = 0
+        while i < n:
+            if ctx.make(player, ctx.moves[d][i]):
+                self.evaluator.setRow(i, ctx.board, player.num)
+            else:
+                self.evaluator.setRow(i, ctx.board, player.opp)
+            ctx.undo()
+            i += 1
+        return self.evaluator.evaluateRows(n, self.num)
+
+    def learnedMaxMove(self, board, alpha, beta, ply):
+        """ Find the max value for this player with the learned evaluation
+            board must be self.context.board, where the moves are made """
+        if board.gameOver():
+            return self.evaluator.score(board, self.num, self.num)
+        elif ply is 0:
+            return self.evaluator.score(board, self.num, self.num)
+        elif ply is 1: # all the children are leaves
+            return self.learnedLeaves(self).max()
+        ctx = self.context
+        d = ctx.top
+        n = ctx.generate(self)
+        max_score = -INFINITY
+        i = 0
+        while i < n:
+            if ctx.make(self, ctx.moves[d][i]): # Another move
+                max_score = max(max_score, self.learnedMaxMove(board, alpha, beta, ply-1))
+            else: # opponent's move
+                max_score = max(max_score, self.learnedMinMove(board, alpha, beta, ply-1))
+            ctx.undo()
+            if (max_score >= beta):
+                return max_score
+            alpha = max(alpha, max_score)
+            i += 1
+        return max_score
+
+    def learnedMinMove(self, board, alpha, beta, ply):
+        """ Find the min value for the opponent with the learned evaluation
+            board must be self.context.board, where the moves are made """
+        if board.gameOver():
+            return self.evaluator.score(board, self.opp, self.num)
+        elif ply is 0:
+            return self.evaluator.score(board, self.opp, self.num)
+        elif ply is 1:
+            return self.learnedLeaves(self.opponent).min()
+        ctx = self.context
+        d = ctx.top
+        n = ctx.generate(self.opponent)
         score = INFINITY
-        for action in board.legalMoves(self.opponent): # Examine all feasible actions by the opponent
-            # make a new board
-            nb = deepcopy(board)
-            if nb.makeMove(self.opponent, action): # Opponent makes another move
-                score = min(score, self.customMinMove(nb, alpha, beta, ply-1))
+        i = 0
+        while i < n:
+            if ctx.make(self.opponent, ctx.moves[d][i]): # Opponent makes another move
+                score = min(score, self.learnedMinMove(board, alpha, beta, ply-1))
             else:
-                score = min(score, self.customMaxMove(nb, alpha, beta, ply-1))
+                score = min(score, self.learnedMaxMove(board, alpha, beta, ply-1))
+            ctx.undo()
             if (score <= alpha):
                 return score
             beta = min(beta, score)
+            i += 1
         return score
 
+    def bookMove(self, board):
+        """ Returns the best move recorded in this player's PositionBook for
+            board, or -1 if the position was seen fewer than BOOK_VISITS times """
+        entry = self.book.lookup(board, self.num)
+        if entry is None or entry[0] < self.BOOK_VISITS:
+            return -1
+        return entry[4]
+
     def chooseMove(self, board):
         """ Returns the next move that this player wants to make """
+        if self.book is not None and self.type not in (self.HUMAN, self.RANDOM):
+            move = self.bookMove(board)
+            if move != -1:
+                # once out of the book, syw973 must not play its opening move
+                self.startMove = False
+                print "chose book move", move
+                return move
         if self.type == self.HUMAN:
             move = input("Please enter your move:")
             while not board.legalMove(self, move):
@@ -281,6 +633,10 @@ class Player:
             val, move = self.customMove(board, 10)
             print "choose move", move, "with value", val
             return move
+        elif self.type == self.LEARNED:
+            val, move = self.learnedMove(board, min(self.ply, self.LEARNED_PLY))
+            print "chose move", move, " with value", val
+            return move
         else:
             print "Unknown player type"
             return -1
@@ -295,41 +651,40 @@ class syw973(Player):
         self.ply = 100
         Player.__init__(self, playerNum, playerType, self.ply) 
         self.startMove = True
-        self.p1score = 0 # player 1 score
-        self.p2score = 0 # player 2 score
         self.scoretype = scoretype
 
     def score(self, board):
         """ Evaluate the Mancala board for this player """
         # first add what's in each player's mancala
-        self.p1score = 0
-        self.p2score = 0
-
-        self.p1score += board.scoreCups[0] * 5
-        self.p2score += board.scoreCups[1] * 5
+        p1score = board.scoreCups[0] * 5 # player 1 score
+        p2score = board.scoreCups[1] * 5 # player 2 score
 
         # evaluate the cups on my side
-        for i in range(len(board.P1Cups)):
+        i = 0
+        for stones in board.P1Cups:
             # potential for an extra move, additional weight
-            if i == board.P1Cups[i]:
-                self.p1score += board.P1Cups[i] * 1.3
+            if i == stones:
+                p1score += stones * 1.3
             else:
-                self.p1score += board.P1Cups[i]
+                p1score += stones
+            i += 1
 
-        for i in range(len(board.P2Cups)):
+        i = 0
+        for stones in board.P2Cups:
             # potential for an extra move, additional weight
-            if i == board.P2Cups[i]:
-                self.p2score += board.P2Cups[i] * 1.5
+            if i == stones:
+                p2score += stones * 1.5
             else:
-                self.p2score += board.P2Cups[i]
+                p2score += stones
+            i += 1
 
         # Compensate for winning scenarios
         if board.scoreCups[0] > 24:
-            self.p1score *= 1.5
+            p1score *= 1.5
         if board.scoreCups[1] > 24:
-            self.p2score *= 1.5
+            p2score *= 1.5
 
         if self.num == 1:
-            return ( self.p1score - self.p2score ) / 48
+            return ( p1score - p2score ) / 48
         else:
-            return ( self.p2score - self.p1score) / 48
+            return ( p2score - p1score) / 48
@@ -0,0 +1,162 @@
+# File: PositionBook.py
+# An on-disk index of every position reached in recorded Mancala games.
+# For each position (and the player to move) it keeps how often it was
+# reached, the wins, draws and losses of the player to move from there, and
+# the same totals for each move played from it, so that the best observed
+# move can be looked up without replaying any games.  Positions are keyed
+# by PositionCode.positionKey, so a position and its mirror image with the
+# other player to move are counted together.
+# Usage:
+#   python PositionBook.py add BOOK SOURCE...   (SelfPlay dirs or .jsonl files)
+#   python PositionBook.py stats BOOK
+
+import json
+import os
+import sqlite3
+import sys
+from MancalaBoard import *
+from PositionCode import positionKey
+
+# Games replayed before their counts are written to the book
+BATCH_GAMES = 10000
+# Kept in the book's user_version, so that a book from a different schema
+# is refused instead of misread
+BOOK_VERSION = 1
+
+SCHEMA = """
+create table if not exists positions (
+    key integer primary key,
+    visits integer, wins integer, draws integer, losses integer);
+create table if not exists moves (
+    key integer, move integer,
+    visits integer, wins integer, draws integer, losses integer,
+    primary key (key, move)) without rowid;
+create table if not exists games (id text primary key) without rowid;
+"""
+
+
+def readGames(path):
+    """ Yield (id, winner, moves) for every game in a .jsonl file of games
+        like the SelfPlay shards, or in the results of a SelfPlay directory.
+        Games without a job number are known by the file's full path and
+        their line number. """
+    if os.path.isdir(path):
+        db = sqlite3.connect(os.path.join(path, "queue.db"))
+        for job, winner, moves in db.execute("select job, winner, moves from results"):
+            yield "job:%d" % job, winner, json.loads(moves)
+        db.close()
+        return
+    lineno = 0
+    for line in open(path):
+        lineno += 1
+        game = json.loads(line)
+        if "job" in game:
+            gameId = "job:%d" % game["job"]
+        else:
+            gameId = "%s:%d" % (os.path.abspath(path), lineno)
+        yield gameId, game["winner"], game["moves"]
+
+
+class PositionBook(object):
+    """ Visit counts and outcomes of recorded positions, stored in an
+        SQLite file """
+
+    def __init__(self, path):
+        """ Open the book in path, creating it if needed """
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        version = self.db.execute("pragma user_version").fetchone()[0]
+        if version not in (0, BOOK_VERSION):
+            raise ValueError("%s is a version %d position book, not version %d"
+                             % (path, version, BOOK_VERSION))
+        self.db.executescript(SCHEMA)
+        self.db.execute("pragma user_version = %d" % BOOK_VERSION)
+
+    def close(self):
+        self.db.close()
+
+    def addGames(self, games):
+        """ Replay and count games, an iterable of (id, winner, moves) as
+            returned by readGames.  Games already in the book are skipped.
+            Returns the number of games added. """
+        added = 0
+        batch = []
+        for game in games:
+            batch += [game]
+            if len(batch) == BATCH_GAMES:
+                added += self.addBatch(batch)
+                batch = []
+        if batch:
+            added += self.addBatch(batch)
+        return added
+
+    def addBatch(self, games):
+        """ Count one batch of games in memory and add them in one
+            transaction.  Returns the number of games added. """
+        positions = {}
+        moves = {}
+        added = 0
+        self.db.execute("begin immediate")
+        for gameId, winner, played in games:
+            if self.db.execute("insert or ignore into games values (?)",
+                               (gameId,)).rowcount == 0:
+                continue
+            added += 1
+            board = MancalaBoard()
+            for num, cup in played:
+                key = positionKey(board, num)
+                if winner == 0:
+                    result = 1 # draw
+                elif winner == num:
+                    result = 0 # win
+                else:
+                    result = 2 # loss
+                counts = positions.setdefault(key, [0, 0, 0, 0])
+                counts[0] += 1
+                counts[1 + result] += 1
+                counts = moves.setdefault((key, cup), [0, 0, 0, 0])
+                counts[0] += 1
+                counts[1 + result] += 1
+                board.makeMove(Player(num, Player.HUMAN), cup)
+        self.db.executemany("insert or ignore into positions values (?, 0, 0, 0, 0)",
+                            [(key,) for key in positions])
+        self.db.executemany("update positions set visits = visits + ?, "
+                            "wins = wins + ?, draws = draws + ?, "
+                            "losses = losses + ? where key = ?",
+                            [tuple(counts) + (key,)
+                             for key, counts in positions.items()])
+        self.db.executemany("insert or ignore into moves values (?, ?, 0, 0, 0, 0)",
+                            [(key, cup) for key, cup in moves])
+        self.db.executemany("update moves set visits = visits + ?, "
+                            "wins = wins + ?, draws = draws + ?, "
+                            "losses = losses + ? where key = ? and move = ?",
+                            [tuple(counts) + (key, cup)
+                             for (key, cup), counts in moves.items()])
+        self.db.execute("commit")
+        return added
+
+    def lookup(self, board, toMove):
+        """ Returns (visits, wins, draws, losses, best move) for board with
+            player toMove to move, counted for that player, or None if the
+            position was never reached.  The best move is the one with the
+            best (wins + draws/2) / visits, the most played on ties. """
+        key = positionKey(board, toMove)
+        row = self.db.execute("select visits, wins, draws, losses from positions "
+                              "where key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        best = self.db.execute("select move from moves where key = ? order by "
+                               "(wins + 0.5 * draws) / visits desc, visits desc "
+                               "limit 1", (key,)).fetchone()
+        return tuple(row) + (best[0],)
+
+if __name__ == "__main__":
+    command, book = sys.argv[1], PositionBook(sys.argv[2])
+    if command == "add":
+        for source in sys.argv[3:]:
+            print source, "added", book.addGames(readGames(source)), "games"
+    elif command == "stats":
+        print book.db.execute("select count(*) from games").fetchone()[0], "games,",
+        print book.db.execute("select count(*) from positions").fetchone()[0], "positions"
+    else:
+        print "Unknown command", command
+    book.close()
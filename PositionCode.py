@@ -0,0 +1,276 @@
+# File: PositionCode.py
+# The one encoding of Mancala positions that every cache, book and file
+# format uses.  A position is a list of 14 pit counts: the 6 cups and the
+# mancala of one player, then the 6 cups and the mancala of the other.
+#   boardPits(board)          player 1's side first
+#   moverPits(board, toMove)  the player to move's side first, so that a
+#                             position and its mirror image share one entry
+#   encode(pits)              6 bits per pit packed into one 84 bit code
+#   rank(pits)/unrank(r, n)   a dense number for positions of n stones
+#   positionKey(board, toMove) a 64 bit key: the rank of the mover's pits
+#   zobrist(pits)             a hash that can be updated one pit at a time
+# Run this file to check that everything round-trips through MancalaBoard.
+
+from random import Random
+
+NPITS = 14
+BITS = 6 # enough for the 48 stones of a game
+MASK = (1 << BITS) - 1
+# Most stones a pit can hold
+MAXSTONES = MASK
+# encode's code splits into two 64 bit words after this many pits
+LOPITS = 10
+# Most stones in a position that rank handles (8 per cup), so that every
+# key stays below 2**63
+MAXTOTAL = 96
+
+
+def boardPits(board):
+    """ Returns the pits of board with player 1's side first """
+    return board.P1Cups + board.scoreCups[0:1] + board.P2Cups + board.scoreCups[1:2]
+
+def moverPits(board, toMove):
+    """ Returns the pits of board with player toMove's side first """
+    if toMove == 1:
+        return boardPits(board)
+    return board.P2Cups + board.scoreCups[1:2] + board.P1Cups + board.scoreCups[0:1]
+
+def fillBoard(board, pits, toMove=1):
+    """ Set board to pits, which have player toMove's side first """
+    ncups = board.NCUPS
+    if toMove == 1:
+        board.P1Cups[:] = pits[0:ncups]
+        board.P2Cups[:] = pits[ncups+1:2*ncups+1]
+        board.scoreCups[:] = [pits[ncups], pits[2*ncups+1]]
+    else:
+        board.P2Cups[:] = pits[0:ncups]
+        board.P1Cups[:] = pits[ncups+1:2*ncups+1]
+        board.scoreCups[:] = [pits[2*ncups+1], pits[ncups]]
+
+
+def encode(pits):
+    """ Returns the code of pits: pit i in bits 6*i to 6*i+5 """
+    code = 0
+    for i in range(NPITS - 1, -1, -1):
+        code = (code << BITS) | pits[i]
+    return code
+
+def decode(code):
+    """ Returns the pits of a code from encode """
+    pits = [0] * NPITS
+    for i in range(NPITS):
+        pits[i] = int(code & MASK)
+        code >>= BITS
+    return pits
+
+
+# WAYS[k][n] is the number of ways to put n stones in k pits
+WAYS = [[0] * (MAXTOTAL + 1) for k in range(NPITS + 2)]
+for n in range(len(WAYS[0])):
+    WAYS[1][n] = 1
+for k in range(2, NPITS + 2):
+    total = 0
+    for n in range(len(WAYS[k])):
+        total += WAYS[k-1][n]
+        WAYS[k][n] = total
+
+def ways(n, k):
+    """ Returns the number of ways to put n stones in k pits """
+    if n < 0:
+        return 0
+    return WAYS[k][n]
+
+def rank(pits):
+    """ Returns the position of pits in the lexicographic order of all the
+        positions with the same number of stones (at most MAXTOTAL), from 0
+        to ways(stones, 14) - 1 """
+    n = sum(pits)
+    r = 0
+    for i in range(NPITS - 1):
+        k = NPITS - i
+        # every position with fewer stones in pit i comes first
+        r += ways(n, k) - ways(n - pits[i], k)
+        n -= pits[i]
+    return r
+
+def unrank(r, stones):
+    """ Returns the pits holding stones stones that have rank r """
+    pits = [0] * NPITS
+    n = stones
+    for i in range(NPITS - 1):
+        k = NPITS - i
+        p = 0
+        while ways(n, k) - ways(n - p - 1, k) <= r:
+            p += 1
+        r -= ways(n, k) - ways(n - p, k)
+        pits[i] = p
+        n -= p
+    pits[NPITS - 1] = n
+    return pits
+
+def positionKey(board, toMove):
+    """ Returns the 64 bit key of board with player toMove to move.
+        A position and its mirror image with the other player to move have
+        the same key, so anything stored under it must be relative to the
+        player to move.  Positions with fewer stones come first, then the
+        rank. """
+    pits = moverPits(board, toMove)
+    stones = sum(pits)
+    return ways(stones - 1, NPITS + 1) + rank(pits)
+
+def keyPosition(key):
+    """ Returns the mover's pits of a key from positionKey """
+    stones = 0
+    while ways(stones, NPITS + 1) <= key:
+        stones += 1
+    return unrank(key - ways(stones - 1, NPITS + 1), stones)
+
+
+# One random key per pit and count, 63 bits so that Python 2 keeps the
+# hashes as plain ints
+_zobristRandom = Random(20160421)
+ZOBRIST = [[_zobristRandom.getrandbits(63) for n in range(MAXSTONES + 1)]
+           for i in range(NPITS)]
+# There is no key for the player to move: a search keeps that next to the
+# hash, like Player.analyzeNode does
+
+def zobrist(pits):
+    """ Returns the Zobrist hash of pits """
+    h = 0
+    for i in range(NPITS):
+        h ^= ZOBRIST[i][pits[i]]
+    return h
+
+def zobristUpdate(h, pit, old, new):
+    """ Returns hash h after pit changes from old to new stones """
+    return h ^ ZOBRIST[pit][old] ^ ZOBRIST[pit][new]
+
+
+def encodeArray(pits):
+    """ encode for a NumPy array of positions, one per row.
+        Returns (lo, hi) uint64 arrays: pits 0-9 and pits 10-13 of each code,
+        so that code = hi << 60 | lo. """
+    import numpy as np
+    pits = np.asarray(pits, dtype=np.uint64)
+    lo = np.zeros(pits.shape[0], dtype=np.uint64)
+    hi = np.zeros(pits.shape[0], dtype=np.uint64)
+    for i in range(NPITS - 1, -1, -1):
+        if i >= LOPITS:
+            hi = (hi << np.uint64(BITS)) | pits[:, i]
+        else:
+            lo = (lo << np.uint64(BITS)) | pits[:, i]
+    return lo, hi
+
+def decodeArray(lo, hi):
+    """ decode for the (lo, hi) arrays of encodeArray.
+        Returns an array of positions, one per row. """
+    import numpy as np
+    lo = np.array(lo, dtype=np.uint64)
+    hi = np.array(hi, dtype=np.uint64)
+    pits = np.zeros((lo.shape[0], NPITS), dtype=np.int64)
+    for i in range(NPITS):
+        if i >= LOPITS:
+            pits[:, i] = hi & np.uint64(MASK)
+            hi >>= np.uint64(BITS)
+        else:
+            pits[:, i] = lo & np.uint64(MASK)
+            lo >>= np.uint64(BITS)
+    return pits
+
+def _waysArray():
+    """ Returns WAYS as a uint64 array, with a column of zeros in front so
+        that column n + 1 holds n stones and column 0 a negative count """
+    import numpy as np
+    table = np.zeros((NPITS + 2, len(WAYS[0]) + 1), dtype=np.uint64)
+    table[:, 1:] = WAYS
+    return table
+
+def rankArray(pits):
+    """ rank for a NumPy array of positions, one per row """
+    import numpy as np
+    pits = np.asarray(pits, dtype=np.int64)
+    table = _waysArray()
+    n = pits.sum(axis=1)
+    r = np.zeros(pits.shape[0], dtype=np.uint64)
+    for i in range(NPITS - 1):
+        k = NPITS - i
+        r += table[k, n + 1] - table[k, n - pits[:, i] + 1]
+        n -= pits[:, i]
+    return r
+
+def unrankArray(ranks, stones):
+    """ unrank for an array of ranks of positions with stones stones """
+    import numpy as np
+    r = np.array(ranks, dtype=np.uint64)
+    table = _waysArray()
+    pits = np.zeros((r.shape[0], NPITS), dtype=np.int64)
+    n = np.full(r.shape[0], stones, dtype=np.int64)
+    p = np.arange(stones + 1)
+    for i in range(NPITS - 1):
+        k = NPITS - i
+        # below[j, p] is how many positions have fewer than p + 1 stones
+        # in pit i; pit i holds the first p with more than r of those
+        rest = np.maximum(n[:, None] - p[None, :], 0)
+        below = table[k, n + 1][:, None] - table[k, rest]
+        pits[:, i] = (below <= r[:, None]).sum(axis=1)
+        r -= table[k, n + 1] - table[k, n - pits[:, i] + 1]
+        n -= pits[:, i]
+    pits[:, NPITS - 1] = n
+    return pits
+
+
+def selfCheck(games=200, seed=0):
+    """ Check every encoding against the positions of random games.
+        Returns (positions checked, whether numpy was there to check the
+        array functions too) """
+    from MancalaBoard import MancalaBoard, Player
+    rng = Random(seed)
+    seen = []
+    for g in range(games):
+        board = MancalaBoard()
+        players = [Player(1, Player.RANDOM), Player(2, Player.RANDOM)]
+        turn = 0
+        while not board.gameOver():
+            for toMove in (1, 2):
+                pits = moverPits(board, toMove)
+                assert decode(encode(pits)) == pits
+                assert unrank(rank(pits), sum(pits)) == pits
+                assert keyPosition(positionKey(board, toMove)) == pits
+                copy = MancalaBoard()
+                fillBoard(copy, pits, toMove)
+                assert boardPits(copy) == boardPits(board)
+            # the mirror image with the other player to move shares the key
+            mirror = MancalaBoard()
+            fillBoard(mirror, boardPits(board), 2)
+            assert positionKey(mirror, 2) == positionKey(board, 1)
+            # one pit at a time gives the same hash as starting over
+            before = boardPits(board)
+            h = zobrist(before)
+            if not board.makeMove(players[turn], rng.choice(board.legalMoves(players[turn]))):
+                turn = 1 - turn
+            after = boardPits(board)
+            for i in range(NPITS):
+                h = zobristUpdate(h, i, before[i], after[i])
+            assert h == zobrist(after)
+            seen += [after]
+    assert rank([0] * (NPITS - 1) + [48]) == 0
+    assert rank([48] + [0] * (NPITS - 1)) == ways(48, NPITS) - 1
+    try:
+        import numpy as np
+    except ImportError:
+        return len(seen), False
+    array = np.array(seen)
+    lo, hi = encodeArray(array)
+    assert [int(h) << (BITS * LOPITS) | int(l) for l, h in zip(lo, hi)] == \
+           [encode(pits) for pits in seen]
+    assert (decodeArray(lo, hi) == array).all()
+    ranks = rankArray(array)
+    assert [int(r) for r in ranks] == [rank(pits) for pits in seen]
+    assert (unrankArray(ranks, 48) == array).all()
+    return len(seen), True
+
+if __name__ == "__main__":
+    positions, arrays = selfCheck()
+    print "checked", positions, "positions"
+    if not arrays:
+        print "numpy is not installed, skipped the array functions"
@@ -0,0 +1,132 @@
+# File: SearchContext.py
+# Defines the scratch state a Player reuses while searching a Mancala board.
+# Every stack is allocated up front, so that a search makes and undoes
+# moves on one board instead of copying a new board at every node.
+
+from copy import *
+from PositionCode import ZOBRIST, boardPits, zobrist
+
+
+class SearchContext(object):
+    """ Per-ply move buffers and undo records for searching
+        positions on a single scratch board """
+    __slots__ = ('board', 'player', 'opponent', 'size', 'top', 'nodes',
+                 'moves', 'nmoves', 'undoP1', 'undoP2', 'undoScore',
+                 'hashing', 'hash', 'undoHash')
+
+    def __init__(self, player, opponent, board, size):
+        """ Initialize a context for player (searching against opponent) on
+            a copy of board, with room for size plies """
+        self.board = deepcopy(board)
+        self.player = player
+        self.opponent = opponent
+        self.size = 0
+        self.top = 0
+        self.nodes = 0
+        self.moves = []
+        self.nmoves = []
+        self.undoP1 = []
+        self.undoP2 = []
+        self.undoScore = []
+        self.undoHash = []
+        self.hashing = False # keep hash up to date in make
+        self.hash = 0
+        self.reserve(size)
+
+    def reserve(self, size):
+        """ Make sure the stacks hold at least size plies.  Only call this
+            between searches, since it is the one place that allocates. """
+        ncups = self.board.NCUPS
+        while self.size < size:
+            self.moves += [[0]*ncups]
+            self.nmoves += [0]
+            self.undoP1 += [[0]*ncups]
+            self.undoP2 += [[0]*ncups]
+            self.undoScore += [[0, 0]]
+            self.undoHash += [0]
+            self.size += 1
+
+    def load(self, board):
+        """ Copy the position on board into the scratch board and reset the
+            stacks for a new search """
+        self.board.P1Cups[:] = board.P1Cups
+        self.board.P2Cups[:] = board.P2Cups
+        self.board.scoreCups[:] = board.scoreCups
+        self.hash = zobrist(boardPits(self.board))
+        self.top = 0
+        self.nodes = 0
+
+    def generate(self, player, noisy=False, replay=True):
+        """ Fill the move buffer of the current ply with the legal moves of
+            player (if noisy only captures, and extra turns if the search
+            lets player replay them).  Returns the number of moves. """
+        board = self.board
+        cups = board.getPlayersCups(player.num)
+        buf = self.moves[self.top]
+        n = 0
+        cup = 1
+        while cup <= board.NCUPS:
+            if cups[cup-1] != 0 and \
+               (not noisy or
+                (board.isNoisyMove(player, cup) if replay
+                 else board.isCapture(player, cup))):
+                buf[n] = cup
+                n += 1
+            cup += 1
+        self.nmoves[self.top] = n
+        return n
+
+    def make(self, player, cup):
+        """ Save the position in the undo record of the current ply, then
+            make the move and go one ply deeper.
+            Returns True if the player gets another turn. """
+        board = self.board
+        top = self.top
+        self.undoP1[top][:] = board.P1Cups
+        self.undoP2[top][:] = board.P2Cups
+        self.undoScore[top][:] = board.scoreCups
+        self.undoHash[top] = self.hash
+        self.top = top + 1
+        self.nodes += 1
+        again = board.makeMove(player, cup)
+        if self.hashing:
+            self.rehash(top)
+        return again
+
+    def rehash(self, top):
+        """ Update the Zobrist hash of the board (see PositionCode) for the
+            pits that changed since the undo record of ply top """
+        board = self.board
+        h = self.hash
+        ncups = board.NCUPS
+        before = self.undoP1[top]
+        cups = board.P1Cups
+        i = 0
+        while i < ncups:
+            if cups[i] != before[i]:
+                h ^= ZOBRIST[i][before[i]] ^ ZOBRIST[i][cups[i]]
+            i += 1
+        before = self.undoP2[top]
+        cups = board.P2Cups
+        i = 0
+        while i < ncups:
+            if cups[i] != before[i]:
+                h ^= ZOBRIST[ncups+1+i][before[i]] ^ ZOBRIST[ncups+1+i][cups[i]]
+            i += 1
+        before = self.undoScore[top]
+        cups = board.scoreCups
+        if cups[0] != before[0]:
+            h ^= ZOBRIST[ncups][before[0]] ^ ZOBRIST[ncups][cups[0]]
+        if cups[1] != before[1]:
+            h ^= ZOBRIST[2*ncups+1][before[1]] ^ ZOBRIST[2*ncups+1][cups[1]]
+        self.hash = h
+
+    def undo(self):
+        """ Go back one ply and restore the position saved by make """
+        self.top -= 1
+        top = self.top
+        board = self.board
+        board.P1Cups[:] = self.undoP1[top]
+        board.P2Cups[:] = self.undoP2[top]
+        board.scoreCups[:] = self.undoScore[top]
+        self.hash = self.undoHash[top]
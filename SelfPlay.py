@@ -0,0 +1,278 @@
+# File: SelfPlay.py
+# Plays many headless Mancala games spread over any number of worker
+# processes or hosts.  Everything lives in one shared directory:
+#   queue.db         SQLite database with the match jobs and merged results
+#   shards/*.jsonl   one result file per worker run, one game per line
+#   rejected.jsonl   shard lines merge could not read
+# Usage:
+#   python SelfPlay.py submit DIR games p1type p1ply p2type p2ply [seed [openings [weightfile]]]
+#     (weightfile holds the weights of LEARNED players, see LearnedEval.py)
+#   python SelfPlay.py work DIR [processes]
+#   python SelfPlay.py merge DIR
+
+import json
+import os
+import socket
+import sqlite3
+import sys
+import time
+import uuid
+from multiprocessing import Process
+from random import Random, seed, choice
+from MancalaBoard import *
+
+# Seconds a worker may go without a move before another worker can take
+# its job over; the lease is renewed after every move
+LEASE_SECONDS = 300
+
+# Times a job is leased before it is marked failed instead of played again
+MAX_ATTEMPTS = 3
+
+# Random moves, drawn from the job's seed, that open every game, so that
+# the searching players don't play the same game in every job
+OPENING_MOVES = 4
+
+SCHEMA = """
+create table if not exists jobs (
+    id integer primary key,
+    p1type integer, p1ply integer, p2type integer, p2ply integer,
+    seed integer, openings integer, weights text,
+    state text default 'pending',
+    worker text, leaseUntil real, attempts integer default 0);
+create table if not exists shards (
+    name text primary key, offset integer);
+create table if not exists results (
+    job integer primary key,
+    p1type integer, p1ply integer, p2type integer, p2ply integer,
+    winner integer, score1 integer, score2 integer, moves text);
+"""
+
+
+def connect(queueDir):
+    """ Open the queue database in queueDir, creating it if needed """
+    if not os.path.isdir(os.path.join(queueDir, "shards")):
+        try:
+            os.makedirs(os.path.join(queueDir, "shards"))
+        except OSError: # another process made it first
+            pass
+    db = sqlite3.connect(os.path.join(queueDir, "queue.db"), timeout=60,
+                         isolation_level=None)
+    db.executescript(SCHEMA)
+    return db
+
+def submitJobs(queueDir, games, p1type, p1ply, p2type, p2ply, firstSeed=0,
+               openings=OPENING_MOVES, weightFile=None):
+    """ Add games match jobs between the given player types and plies, with
+        seeds firstSeed, firstSeed+1, ... and openings random moves to open
+        each game.  LEARNED players load weightFile (LearnedEval.WEIGHT_FILE
+        if None).  Returns the number of jobs. """
+    db = connect(queueDir)
+    db.execute("begin immediate")
+    for i in range(games):
+        db.execute("insert into jobs (p1type, p1ply, p2type, p2ply, seed, "
+                   "openings, weights) values (?, ?, ?, ?, ?, ?, ?)",
+                   (p1type, p1ply, p2type, p2ply, firstSeed + i, openings,
+                    weightFile))
+    db.execute("commit")
+    db.close()
+    return games
+
+def leaseJob(db, worker, leaseSeconds=LEASE_SECONDS):
+    """ Take the next pending job, or one whose lease has run out because
+        its worker died.  Jobs that ran out of their lease MAX_ATTEMPTS
+        times are marked failed instead.  Returns the job row or None if
+        there is none. """
+    now = time.time()
+    db.execute("begin immediate")
+    db.execute("update jobs set state = 'failed' where state = 'leased' and "
+               "leaseUntil < ? and attempts >= ?", (now, MAX_ATTEMPTS))
+    job = db.execute("select id, p1type, p1ply, p2type, p2ply, seed, openings, "
+                     "weights from jobs "
+                     "where state = 'pending' or "
+                     "(state = 'leased' and leaseUntil < ?) "
+                     "order by id limit 1", (now,)).fetchone()
+    if job is not None:
+        db.execute("update jobs set state = 'leased', worker = ?, "
+                   "leaseUntil = ?, attempts = attempts + 1 where id = ?",
+                   (worker, now + leaseSeconds, job[0]))
+    db.execute("commit")
+    return job
+
+def renewLease(db, jobId, worker, leaseSeconds=LEASE_SECONDS):
+    """ Extend worker's lease on job jobId.  Returns False if the job is
+        no longer leased to worker. """
+    return db.execute("update jobs set leaseUntil = ? where id = ? and "
+                      "worker = ? and state = 'leased'",
+                      (time.time() + leaseSeconds, jobId, worker)).rowcount == 1
+
+def makePlayer(playerNum, playerType, ply, weightFile=None):
+    """ Returns a computer player of the given type searching ply plies,
+        with the weights in weightFile if it is a LEARNED player """
+    player = syw973(playerNum, playerType, 0)
+    player.ply = ply
+    player.weightFile = weightFile
+    player.startMove = False
+    return player
+
+def pickMove(player, board):
+    """ Returns the move player makes on board, without printing """
+    if player.type == Player.RANDOM:
+        return choice(board.legalMoves(player))
+    elif player.type == Player.MINIMAX:
+        return player.minimaxMove(board, player.ply)[1]
+    elif player.type == Player.ABPRUNE:
+        return player.alphaBetaMove(board, player.ply)[1]
+    elif player.type == Player.CUSTOM:
+        return player.customMove(board, player.ply)[1]
+    elif player.type == Player.LEARNED:
+        return player.learnedMove(board, player.ply)[1]
+    raise ValueError("player type %d can't play headless" % player.type)
+
+def playMatch(p1type, p1ply, p2type, p2ply, gameSeed, openings=OPENING_MOVES,
+              weightFile=None, heartbeat=None):
+    """ Play one game without printing, the first openings moves at random.
+        LEARNED players load weightFile.
+        heartbeat, if given, is called after every move.
+        Returns (winner, scoreCups, moves) where winner is 1, 2 or 0 for a
+        tie and moves lists [playerNum, cup] for every move made. """
+    seed(gameSeed)
+    rng = Random(gameSeed)
+    board = MancalaBoard()
+    players = [makePlayer(1, p1type, p1ply, weightFile),
+               makePlayer(2, p2type, p2ply, weightFile)]
+    turn = 0
+    moves = []
+    while not board.gameOver():
+        if len(moves) < openings:
+            move = rng.choice(board.legalMoves(players[turn]))
+        else:
+            move = pickMove(players[turn], board)
+        moves += [[players[turn].num, move]]
+        if not board.makeMove(players[turn], move):
+            turn = 1 - turn
+        if heartbeat is not None:
+            heartbeat()
+    if board.hasWon(1):
+        winner = 1
+    elif board.hasWon(2):
+        winner = 2
+    else:
+        winner = 0
+    return winner, list(board.scoreCups), moves
+
+def runWorker(queueDir, worker=None, leaseSeconds=LEASE_SECONDS):
+    """ Play jobs from the queue in queueDir until there are none left,
+        appending each result to a shard of its own.
+        Returns the number of games played. """
+    if worker is None:
+        worker = "%s-%d" % (socket.gethostname(), os.getpid())
+    # A new shard for every run, so that a later worker with a reused pid
+    # never appends to the partial last line of one that crashed
+    worker += "-" + uuid.uuid4().hex[:12]
+    db = connect(queueDir)
+    shard = open(os.path.join(queueDir, "shards", worker + ".jsonl"), "a")
+    played = 0
+    job = leaseJob(db, worker, leaseSeconds)
+    while job is not None:
+        jobId, p1type, p1ply, p2type, p2ply, gameSeed, openings, weightFile = job
+        heartbeat = lambda: renewLease(db, jobId, worker, leaseSeconds)
+        winner, scores, moves = playMatch(p1type, p1ply, p2type, p2ply,
+                                          gameSeed, openings, weightFile,
+                                          heartbeat)
+        shard.write(json.dumps({"job": jobId, "p1type": p1type, "p1ply": p1ply,
+                                "p2type": p2type, "p2ply": p2ply,
+                                "winner": winner, "score": scores,
+                                "moves": moves}) + "\n")
+        # The result must be on disk before the job is done; if we die in
+        # between the job is played again and merge drops the duplicate.
+        shard.flush()
+        os.fsync(shard.fileno())
+        db.execute("update jobs set state = 'done' where id = ? and worker = ?",
+                   (jobId, worker))
+        played += 1
+        job = leaseJob(db, worker, leaseSeconds)
+    shard.close()
+    db.close()
+    return played
+
+def runWorkers(queueDir, processes):
+    """ Run processes workers on this machine and wait for them """
+    workers = [Process(target=runWorker, args=(queueDir,))
+               for i in range(processes)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+def mergeResults(queueDir):
+    """ Read the results added to every shard since the last merge into the
+        results table.  Lines that can't be read are copied to
+        rejected.jsonl and skipped.  Returns the number of new games. """
+    db = connect(queueDir)
+    shardDir = os.path.join(queueDir, "shards")
+    merged = 0
+    for name in sorted(os.listdir(shardDir)):
+        row = db.execute("select offset from shards where name = ?",
+                         (name,)).fetchone()
+        offset = row[0] if row else 0
+        shard = open(os.path.join(shardDir, name), "rb")
+        shard.seek(offset)
+        db.execute("begin immediate")
+        for line in shard:
+            if not line.endswith(b"\n"):
+                break # a worker is still writing this one
+            offset += len(line)
+            try:
+                game = json.loads(line.decode("utf-8"))
+                row = (game["job"], game["p1type"], game["p1ply"],
+                       game["p2type"], game["p2ply"], game["winner"],
+                       game["score"][0], game["score"][1],
+                       json.dumps(game["moves"]))
+            except (ValueError, KeyError, IndexError, TypeError):
+                rejected = open(os.path.join(queueDir, "rejected.jsonl"), "ab")
+                rejected.write(line)
+                rejected.close()
+                continue
+            cursor = db.execute("insert or ignore into results values "
+                                "(?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+            merged += cursor.rowcount
+        db.execute("insert or replace into shards values (?, ?)", (name, offset))
+        db.execute("commit")
+        shard.close()
+    db.close()
+    return merged
+
+def summary(queueDir):
+    """ Returns a list of (p1type, p1ply, p2type, p2ply, p1 wins, p2 wins,
+        ties) over the merged results """
+    db = connect(queueDir)
+    rows = db.execute("select p1type, p1ply, p2type, p2ply, "
+                      "sum(winner = 1), sum(winner = 2), sum(winner = 0) "
+                      "from results group by p1type, p1ply, p2type, p2ply").fetchall()
+    db.close()
+    return rows
+
+def failedJobs(queueDir):
+    """ Returns the ids of the jobs that were given up on """
+    db = connect(queueDir)
+    rows = db.execute("select id from jobs where state = 'failed'").fetchall()
+    db.close()
+    return [row[0] for row in rows]
+
+if __name__ == "__main__":
+    command, queueDir = sys.argv[1], sys.argv[2]
+    args = [int(arg) for arg in sys.argv[3:10]]
+    if command == "submit":
+        weightFile = sys.argv[10] if len(sys.argv) > 10 else None
+        print "submitted", submitJobs(queueDir, *args, weightFile=weightFile), "jobs"
+    elif command == "work":
+        runWorkers(queueDir, args[0] if args else 1)
+    elif command == "merge":
+        print "merged", mergeResults(queueDir), "new games"
+        for row in summary(queueDir):
+            print "p1 type %d ply %d vs p2 type %d ply %d: %d-%d, %d ties" % row
+        failed = failedJobs(queueDir)
+        if failed:
+            print len(failed), "failed jobs:", " ".join(str(job) for job in failed)
+    else:
+        print "Unknown command", command